@@ -3,10 +3,12 @@ import io
 import os
 import re
 import json
-import html
+import threading
 import urllib.parse
-from datetime import date, datetime, timedelta
-from typing import Dict, Tuple, Optional
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Hashable, Iterable, Iterator, Tuple, Optional
 
 from db import (
     init_db,
@@ -17,6 +19,7 @@ from db import (
     update_client,
     delete_client,
     fetch_income_stats,
+    data_version,
 )
 
 
@@ -30,17 +33,49 @@ def read_file(path: str) -> bytes:
         return f.read()
 
 
-def render_page(title: str, body_html: str, messages: Optional[Dict[str, str]] = None) -> bytes:
-    base_path = os.path.join(TEMPLATES_DIR, "base.html")
-    base = read_file(base_path).decode("utf-8")
-    flash_html = ""
+# Template base lido uma única vez no import (evita I/O a cada requisição)
+_BASE_TEMPLATE: str = read_file(os.path.join(TEMPLATES_DIR, "base.html")).decode("utf-8")
+
+
+def _split_template(template: str) -> Tuple[str, str, str, str]:
+    pre_title, rest = template.split("{{ title }}", 1)
+    pre_flash, rest = rest.split("{{ flash }}", 1)
+    pre_body, tail = rest.split("{{ body }}", 1)
+    return pre_title, pre_flash, pre_body, tail
+
+
+# Segmentos fixos do template, entre os placeholders title/flash/body, já em UTF-8
+_PRE_TITLE, _PRE_FLASH, _PRE_BODY, _TAIL = (seg.encode("utf-8") for seg in _split_template(_BASE_TEMPLATE))
+
+
+_ESCAPE_PROBE = re.compile(r'[&<>"\']')
+# Mesma tabela de html.escape(quote=True), aplicada em C por str.translate
+_HTML_TT = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'})
+
+
+def fast_escape(s: str) -> str:
+    # Caminho rápido: a maioria dos valores não tem caracteres especiais
+    return s if _ESCAPE_PROBE.search(s) is None else s.translate(_HTML_TT)
+
+
+def iter_page(title: str, body_chunks: Iterable[bytes], messages: Optional[Dict[str, str]] = None) -> Iterator[bytes]:
+    # Página em pedaços: cabeçalho do template, cada pedaço do corpo e o rodapé
+    esc = fast_escape
+    flash_parts = []
     if messages:
         for level, msg in messages.items():
-            flash_html += f'<div class="flash {html.escape(level)}">{html.escape(msg)}</div>'
-    out = base.replace("{{ title }}", html.escape(title))
-    out = out.replace("{{ flash }}", flash_html)
-    out = out.replace("{{ body }}", body_html)
-    return out.encode("utf-8")
+            flash_parts.append(f'<div class="flash {esc(level)}">{esc(msg)}</div>')
+    yield b''.join((
+        _PRE_TITLE, esc(title).encode("utf-8"),
+        _PRE_FLASH, ''.join(flash_parts).encode("utf-8"),
+        _PRE_BODY,
+    ))
+    yield from body_chunks
+    yield _TAIL
+
+
+def render_page(title: str, body_html: str, messages: Optional[Dict[str, str]] = None) -> bytes:
+    return b''.join(iter_page(title, (body_html.encode("utf-8"),), messages))
 
 
 def parse_post(environ) -> Dict[str, str]:
@@ -51,7 +86,8 @@ def parse_post(environ) -> Dict[str, str]:
     data = environ['wsgi.input'].read(size) if size > 0 else b""
     ctype = environ.get('CONTENT_TYPE', '')
     if 'application/x-www-form-urlencoded' in ctype:
-        return {k: v[0] for k, v in urllib.parse.parse_qs(data.decode('utf-8')).items()}
+        # parse_qsl gera os pares direto, sem o dict de listas do parse_qs
+        return dict(urllib.parse.parse_qsl(data.decode('utf-8', 'replace'), keep_blank_values=True))
     return {}
 
 
@@ -60,115 +96,267 @@ def http_redirect(start_response, location: str):
     return [b'']
 
 
+def make_etag(*parts) -> str:
+    return 'W/"' + '-'.join(str(p) for p in parts) + '"'
+
+
+def etag_matches(environ, etag: str) -> bool:
+    inm = environ.get('HTTP_IF_NONE_MATCH')
+    if not inm:
+        return False
+    return any(t.strip() in (etag, '*') for t in inm.split(','))
+
+
+def not_modified(start_response, etag: str):
+    start_response('304 Not Modified', [('ETag', etag)])
+    return [b'']
+
+
+def html_headers(etag: str):
+    return [
+        ('Content-Type', 'text/html; charset=utf-8'),
+        ('ETag', etag),
+        ('Cache-Control', 'no-cache'),
+    ]
+
+
+def html_ok(start_response, page: bytes, etag: str):
+    start_response('200 OK', html_headers(etag))
+    return [page]
+
+
+# Páginas renderizadas (LRU em memória), indexadas por rota, parâmetros e versão dos dados.
+# Limitado pelo total de bytes; páginas maiores que PAGE_CACHE_MAX_PAGE_BYTES nunca são guardadas.
+PAGE_CACHE_MAX_BYTES = 8 * 1024 * 1024
+PAGE_CACHE_MAX_PAGE_BYTES = 256 * 1024
+_page_cache: "OrderedDict[Hashable, bytes]" = OrderedDict()
+_page_cache_bytes = 0
+_page_cache_lock = threading.Lock()
+
+
+def page_cache_get(key: Hashable) -> Optional[bytes]:
+    with _page_cache_lock:
+        page = _page_cache.get(key)
+        if page is not None:
+            _page_cache.move_to_end(key)
+        return page
+
+
+def page_cache_put(key: Hashable, page: bytes):
+    global _page_cache_bytes
+    if len(page) > PAGE_CACHE_MAX_PAGE_BYTES:
+        return
+    with _page_cache_lock:
+        old = _page_cache.pop(key, None)
+        if old is not None:
+            _page_cache_bytes -= len(old)
+        _page_cache[key] = page
+        _page_cache_bytes += len(page)
+        while _page_cache_bytes > PAGE_CACHE_MAX_BYTES:
+            _, evicted = _page_cache.popitem(last=False)
+            _page_cache_bytes -= len(evicted)
+
+
+def stream_and_cache(key: Hashable, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    # Envia cada pedaço assim que fica pronto. Páginas pequenas são acumuladas e entram no
+    # cache ao terminar; acima de PAGE_CACHE_MAX_PAGE_BYTES o acúmulo é descartado e a
+    # página só é transmitida (memória de um pedaço por vez).
+    sent = []
+    size = 0
+    for chunk in chunks:
+        if sent is not None:
+            size += len(chunk)
+            if size > PAGE_CACHE_MAX_PAGE_BYTES:
+                sent = None
+            else:
+                sent.append(chunk)
+        yield chunk
+    if sent is not None:
+        page_cache_put(key, b''.join(sent))
+
+
 def not_found(start_response):
     start_response('404 Not Found', [('Content-Type', 'text/plain; charset=utf-8')])
     return [b'Not Found']
 
 
+# Content-Type por extensão dos arquivos em /static
+_STATIC_CTYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.svg': 'image/svg+xml; charset=utf-8',
+}
+STATIC_BLOCK_SIZE = 65536
+
+
+def _iter_file(f, block_size: int):
+    try:
+        while True:
+            chunk = f.read(block_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+
 def static_app(environ, start_response):
     path = environ.get('PATH_INFO', '/')
     rel = path[len('/static/'):]
     fs_path = os.path.normpath(os.path.join(STATIC_DIR, rel))
-    if not fs_path.startswith(STATIC_DIR) or not os.path.exists(fs_path):
+    if not fs_path.startswith(STATIC_DIR + os.sep) or not os.path.isfile(fs_path):
         return not_found(start_response)
-    if fs_path.endswith('.css'):
-        ctype = 'text/css; charset=utf-8'
-    elif fs_path.endswith('.js'):
-        ctype = 'application/javascript; charset=utf-8'
-    elif fs_path.endswith('.png'):
-        ctype = 'image/png'
-    elif fs_path.endswith('.jpg') or fs_path.endswith('.jpeg'):
-        ctype = 'image/jpeg'
-    elif fs_path.endswith('.svg'):
-        ctype = 'image/svg+xml; charset=utf-8'
-    else:
-        ctype = 'application/octet-stream'
-    start_response('200 OK', [('Content-Type', ctype)])
-    return [read_file(fs_path)]
+    ctype = _STATIC_CTYPES.get(os.path.splitext(fs_path)[1].lower(), 'application/octet-stream')
+    try:
+        f = open(fs_path, 'rb')
+    except OSError:
+        # Sem permissão de leitura ou removido entre o isfile e o open
+        return not_found(start_response)
+    size = os.fstat(f.fileno()).st_size
+    start_response('200 OK', [
+        ('Content-Type', ctype),
+        ('Content-Length', str(size)),
+        ('Cache-Control', 'public, max-age=86400'),
+    ])
+    # file_wrapper permite ao servidor usar sendfile(2) em vez de copiar o arquivo
+    wrapper = environ.get('wsgi.file_wrapper')
+    if wrapper is not None:
+        return wrapper(f, STATIC_BLOCK_SIZE)
+    return _iter_file(f, STATIC_BLOCK_SIZE)
 
 
 def safe_date(s: str) -> Optional[date]:
+    # Só YYYY-MM-DD: no 3.11+ fromisoformat também aceita 20000101 e 2000-W01-1
+    if len(s) != 10 or not s[4] == s[7] == '-':
+        return None
     try:
-        return datetime.strptime(s, "%Y-%m-%d").date()
-    except Exception:
+        return date.fromisoformat(s)
+    except ValueError:
         return None
 
 
 def format_currency(value: Optional[float]) -> str:
     if value is None:
         return "—"
-    integer = int(round(value))
+    # Arredonda meio para longe do zero, igual ao ROUND do Postgres usado na listagem
+    integer = int(Decimal(str(value)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
     s = f"{integer:,}".replace(",", ".")
     return f"R$ {s}"
 
 
-def income_class(value: Optional[float]) -> Optional[str]:
-    if value is None:
-        return None
-    if value <= 980.00:
-        return 'A'
-    if 980.00 < value <= 2500.00:
-        return 'B'
-    return 'C'
+# Regra solicitada: CPF com 10 dígitos (somente números)
+CPF_REGEX = re.compile(r"\d{10}")
 
 
 def cpf_is_valid(cpf: str) -> bool:
-    # Regra solicitada: CPF com 10 dígitos (somente números)
-    return bool(re.fullmatch(r"\d{10}", cpf))
+    return CPF_REGEX.fullmatch(cpf) is not None
 
 
 # Nome: apenas letras (com acentos), espaço, apóstrofo (' ou ’), hífen (-) e ponto (.)
-NAME_REGEX = re.compile(r"^[A-Za-zÀ-ÖØ-öø-ÿ'’\.\- ]{1,150}$")
-
+# (o limite de 150 é checado antes, por len; aqui só o conjunto de caracteres)
+NAME_REGEX = re.compile(r"\A[A-Za-zÀ-ÖØ-öø-ÿ'’.\- ]+\Z")
+
+
+# Fragmentos fixos de cada linha da listagem de clientes
+_ROW_OPEN = '<tr><td>'
+_ROW_INCOME = '</td><td class="col-income">'
+_BADGE_NEUTRAL = '<span class="badge-income badge-neutral">'
+_BADGE_BY_CLASS = {
+    'A': '<span class="badge-income badge-a">',
+    'B': '<span class="badge-income badge-b">',
+    'C': '<span class="badge-income badge-c">',
+}
+_BADGE_CLOSE = '</span>'
+_ROW_EDIT = '</td><td class="col-actions"><a class="btn btn-secondary" href="/clients/'
+_ROW_DELETE = '/edit">Editar</a><form method="post" action="/clients/'
+_ROW_CLOSE = (
+    '/delete" style="display:inline-block">'
+    '<button class="btn btn-danger" type="submit" data-confirm="Excluir este cliente?">Excluir</button>'
+    '</form></td></tr>'
+)
+_EMPTY_ROW = "<tr><td colspan=3 class='empty'>Nenhum cliente encontrado.</td></tr>".encode("utf-8")
 
-def clients_list(environ, start_response):
-    qs = urllib.parse.parse_qs(environ.get('QUERY_STRING', ''))
-    q = (qs.get('q') or [''])[0].strip()
-    rows = fetch_clients(q)
-    today_str = date.today().isoformat()
-    html_rows = []
-    for r in rows:
-        badge = ''
-        cls = income_class(r['renda_familiar'])
-        label = format_currency(r['renda_familiar'])
-        if cls is None:
-            badge = f'<span class="badge-income badge-neutral">{html.escape(label)}</span>'
-        else:
-            badge = f'<span class="badge-income badge-{cls.lower()}">{html.escape(label)}</span>'
-        html_rows.append(
-            f"""
-            <tr>
-                <td>{html.escape(r['nome'])}</td>
-                <td class=\"col-income\">{badge}</td>
-                <td class=\"col-actions\">
-                    <a class=\"btn btn-secondary\" href=\"/clients/{r['id']}/edit\">Editar</a>
-                    <form method=\"post\" action=\"/clients/{r['id']}/delete\" style=\"display:inline-block\"> 
-                        <button class=\"btn btn-danger\" type=\"submit\" data-confirm=\"Excluir este cliente?\">Excluir</button>
-                    </form>
-                </td>
-            </tr>
-            """
-        )
-    body = f"""
-    <div class=\"page-header\">
+# Moldura estática da listagem, já codificada: só o valor da busca (q) é dinâmico
+_CLIENTS_LIST_HEADER_START = """
+    <div class="page-header">
         <h1>Clientes</h1>
-        <div class=\"actions\">
-            <a class=\"btn btn-primary\" href=\"/clients/new\">Novo Cliente</a>
+        <div class="actions">
+            <a class="btn btn-primary" href="/clients/new">Novo Cliente</a>
         </div>
     </div>
-    <form class=\"search\" method=\"get\" action=\"/clients\">
-        <input type=\"text\" name=\"q\" value=\"{html.escape(q)}\" placeholder=\"Pesquisar por nome...\" maxlength=\"150\" />
-        <button class=\"btn\" type=\"submit\">Pesquisar</button>
+    <form class="search" method="get" action="/clients">
+        <input type="text" name="q" value=\"""".encode("utf-8")
+_CLIENTS_LIST_HEADER_END = """" placeholder="Pesquisar por nome..." maxlength="150" />
+        <button class="btn" type="submit">Pesquisar</button>
     </form>
-    <table class=\"table\">
+    <table class="table">
         <thead><tr><th>Nome</th><th>Renda</th><th></th></tr></thead>
         <tbody>
-            {''.join(html_rows) or '<tr><td colspan=3 class=\'empty\'>Nenhum cliente encontrado.</td></tr>'}
+    """.encode("utf-8")
+_CLIENTS_LIST_FOOTER = """
         </tbody>
     </table>
-    """
-    start_response('200 OK', [('Content-Type', 'text/html; charset=utf-8')])
-    return [render_page("Clientes", body)]
+    """.encode("utf-8")
+
+
+def clients_list(environ, start_response):
+    qs = urllib.parse.parse_qs(environ.get('QUERY_STRING', ''))
+    q = (qs.get('q') or [''])[0].strip()
+    version = data_version()
+    # q não entra no ETag: o cache do navegador já é indexado pela URL
+    etag = make_etag(version)
+    if etag_matches(environ, etag):
+        return not_modified(start_response, etag)
+    # version na chave: qualquer escrita invalida as páginas já renderizadas
+    key = ('clients', q, version)
+    page = page_cache_get(key)
+    if page is not None:
+        return html_ok(start_response, page, etag)
+    # Consulta antes do start_response: erro de banco ainda pode virar 500
+    rows = fetch_clients(q)
+    start_response('200 OK', html_headers(etag))
+    return stream_and_cache(key, iter_page("Clientes", _clients_list_chunks(q, rows)))
+
+
+# Linhas acumuladas por pedaço enviado ao cliente
+LIST_CHUNK_ROWS = 200
+
+
+def _clients_list_chunks(q: str, rows) -> Iterator[bytes]:
+    yield _CLIENTS_LIST_HEADER_START
+    yield fast_escape(q).encode("utf-8")
+    yield _CLIENTS_LIST_HEADER_END
+    out = []
+    # Aliases locais: no laço viram LOAD_FAST em vez de buscas em globals
+    append = out.append
+    esc = fast_escape
+    badges, badge_neutral, badge_close = _BADGE_BY_CLASS, _BADGE_NEUTRAL, _BADGE_CLOSE
+    row_open, row_income, row_edit, row_delete, row_close = _ROW_OPEN, _ROW_INCOME, _ROW_EDIT, _ROW_DELETE, _ROW_CLOSE
+    for i, r in enumerate(rows, 1):
+        cls = r['renda_classe']
+        cid = str(r['id'])
+        append(row_open)
+        append(esc(r['nome']))
+        append(row_income)
+        append(badge_neutral if cls is None else badges[cls])
+        append(r['renda_fmt'])  # só dígitos, 'R$', '.' ou '—': dispensa escape
+        append(badge_close)
+        append(row_edit)
+        append(cid)
+        append(row_delete)
+        append(cid)
+        append(row_close)
+        if i % LIST_CHUNK_ROWS == 0:
+            yield ''.join(out).encode("utf-8")
+            out.clear()
+    if out:
+        yield ''.join(out).encode("utf-8")
+    if not rows:
+        yield _EMPTY_ROW
+    yield _CLIENTS_LIST_FOOTER
 
 
 def client_form(environ, start_response, client=None, errors: Optional[Dict[str, str]] = None):
@@ -177,12 +365,13 @@ def client_form(environ, start_response, client=None, errors: Optional[Dict[str,
     nome = client['nome'] if is_edit else ''
     cpf = client['cpf'] if is_edit else ''
     data_nascimento = client['data_nascimento'] if is_edit else ''
-    data_cadastro = client['data_cadastro'] if is_edit else date.today().isoformat()
-    renda = '' if (not is_edit or client['renda_familiar'] is None) else f"{client['renda_familiar']:.2f}"
     today_str = date.today().isoformat()
+    data_cadastro = client['data_cadastro'] if is_edit else today_str
+    renda = '' if (not is_edit or client['renda_familiar'] is None) else f"{client['renda_familiar']:.2f}"
     err_html = ''
     if errors:
-        items = ''.join(f"<li><strong>{html.escape(k)}</strong>: {html.escape(v)}</li>" for k, v in errors.items())
+        esc = fast_escape
+        items = ''.join(f"<li><strong>{esc(k)}</strong>: {esc(v)}</li>" for k, v in errors.items())
         err_html = f"<div class=\"errors\"><ul>{items}</ul></div>"
     body = f"""
     <div class=\"page-header\">
@@ -195,25 +384,25 @@ def client_form(environ, start_response, client=None, errors: Optional[Dict[str,
     <form class=\"form\" method=\"post\" action=\"{action}\"> 
         <div class=\"field\">
             <label>Nome</label>
-            <input type=\"text\" name=\"nome\" value=\"{html.escape(nome)}\" required maxlength=\"150\" pattern=\"^[A-Za-zÀ-ÖØ-öø-ÿ'’. -]{{1,150}}$\" autocomplete=\"name\" placeholder=\"Nome completo\" />
+            <input type=\"text\" name=\"nome\" value=\"{fast_escape(nome)}\" required maxlength=\"150\" pattern=\"^[A-Za-zÀ-ÖØ-öø-ÿ'’. -]{{1,150}}$\" autocomplete=\"name\" placeholder=\"Nome completo\" />
             <small>Permite letras, espaços, apóstrofo, hífen e ponto.</small>
         </div>
         <div class=\"field\">
             <label>CPF</label>
-            <input type=\"text\" name=\"cpf\" value=\"{html.escape(cpf)}\" required pattern=\"\\d{{10}}\" maxlength=\"10\" inputmode=\"numeric\" placeholder=\"Somente números\" />
+            <input type=\"text\" name=\"cpf\" value=\"{fast_escape(cpf)}\" required pattern=\"\\d{{10}}\" maxlength=\"10\" inputmode=\"numeric\" placeholder=\"Somente números\" />
             <small>Digite 10 dígitos (somente números).</small>
         </div>
         <div class=\"field\">
             <label>Data de nascimento</label>
-            <input type=\"date\" name=\"data_nascimento\" value=\"{html.escape(data_nascimento)}\" required max=\"{today_str}\" lang=\"pt-BR\" placeholder=\"dd/mm/aaaa\" />
+            <input type=\"date\" name=\"data_nascimento\" value=\"{fast_escape(data_nascimento)}\" required max=\"{today_str}\" lang=\"pt-BR\" placeholder=\"dd/mm/aaaa\" />
         </div>
         <div class=\"field\">
             <label>Data de cadastro</label>
-            <input type=\"date\" name=\"data_cadastro\" value=\"{html.escape(data_cadastro)}\" readonly lang=\"pt-BR\" placeholder=\"dd/mm/aaaa\" />
+            <input type=\"date\" name=\"data_cadastro\" value=\"{data_cadastro}\" readonly lang=\"pt-BR\" placeholder=\"dd/mm/aaaa\" />
         </div>
         <div class=\"field\">
             <label>Renda familiar</label>
-            <input type=\"number\" step=\"0.01\" min=\"0\" name=\"renda_familiar\" value=\"{html.escape(renda)}\" placeholder=\"Opcional\" />
+            <input type=\"number\" step=\"0.01\" min=\"0\" name=\"renda_familiar\" value=\"{renda}\" placeholder=\"Opcional\" />
         </div>
         <div class=\"form-actions\">
             <button class=\"btn btn-primary\" type=\"submit\">Salvar</button>
@@ -226,30 +415,28 @@ def client_form(environ, start_response, client=None, errors: Optional[Dict[str,
 
 def clients_create(environ, start_response):
     form = parse_post(environ)
+    today = date.today()
     errors = {}
-    nome = (form.get('nome') or '').strip()
-    nome = re.sub(r"\s+", " ", nome)
+    nome = ' '.join((form.get('nome') or '').split())
     cpf = (form.get('cpf') or '').strip()
     data_nascimento = (form.get('data_nascimento') or '').strip()
-    data_cadastro = (form.get('data_cadastro') or '').strip() or date.today().isoformat()
+    data_cadastro = (form.get('data_cadastro') or '').strip() or today.isoformat()
     renda_raw = (form.get('renda_familiar') or '').strip()
     renda = None
     if not nome:
         errors['Nome'] = 'Campo obrigatório.'
-    if len(nome) > 150:
+    elif len(nome) > 150:
         errors['Nome'] = 'Máximo 150 caracteres.'
-    elif not NAME_REGEX.fullmatch(nome):
+    elif not NAME_REGEX.match(nome):
         errors['Nome'] = "Use apenas letras, espaços, apóstrofo, hífen e ponto."
-    if not cpf or not re.fullmatch(r"\d{10}", cpf):
+    if not cpf_is_valid(cpf):
         errors['CPF'] = 'Informe 10 dígitos numéricos.'
-    elif not cpf_is_valid(cpf):
-        errors['CPF'] = 'CPF inválido.'
     dn = safe_date(data_nascimento)
     if not dn:
         errors['Data de nascimento'] = 'Data inválida ou vazia.'
-    elif dn > date.today():
+    elif dn > today:
         errors['Data de nascimento'] = 'Não pode ser futura.'
-    dc = safe_date(data_cadastro) or date.today()
+    dc = safe_date(data_cadastro) or today
     if renda_raw:
         try:
             renda = float(renda_raw)
@@ -270,9 +457,9 @@ def clients_update(environ, start_response, client_id: int):
     if not client:
         return not_found(start_response)
     form = parse_post(environ)
+    today = date.today()
     errors = {}
-    nome = (form.get('nome') or '').strip()
-    nome = re.sub(r"\s+", " ", nome)
+    nome = ' '.join((form.get('nome') or '').split())
     cpf = (form.get('cpf') or '').strip()
     data_nascimento = (form.get('data_nascimento') or '').strip()
     data_cadastro = client['data_cadastro']  # keep original
@@ -280,18 +467,16 @@ def clients_update(environ, start_response, client_id: int):
     renda = None
     if not nome:
         errors['Nome'] = 'Campo obrigatório.'
-    if len(nome) > 150:
+    elif len(nome) > 150:
         errors['Nome'] = 'Máximo 150 caracteres.'
-    elif not NAME_REGEX.fullmatch(nome):
+    elif not NAME_REGEX.match(nome):
         errors['Nome'] = "Use apenas letras, espaços, apóstrofo, hífen e ponto."
-    if not cpf or not re.fullmatch(r"\d{10}", cpf):
+    if not cpf_is_valid(cpf):
         errors['CPF'] = 'Informe 10 dígitos numéricos.'
-    elif not cpf_is_valid(cpf):
-        errors['CPF'] = 'CPF inválido.'
     dn = safe_date(data_nascimento)
     if not dn:
         errors['Data de nascimento'] = 'Data inválida ou vazia.'
-    elif dn > date.today():
+    elif dn > today:
         errors['Data de nascimento'] = 'Não pode ser futura.'
     if renda_raw:
         try:
@@ -321,6 +506,20 @@ def reports(environ, start_response):
     qs = urllib.parse.parse_qs(environ.get('QUERY_STRING', ''))
     period = (qs.get('period') or ['month'])[0]
     today = date.today()
+    version = data_version()
+    # A data entra no ETag: períodos e idades mudam na virada do dia
+    etag = make_etag(version, today.isoformat())
+    if etag_matches(environ, etag):
+        return not_modified(start_response, etag)
+    key = ('reports', period, today, version)
+    page = page_cache_get(key)
+    if page is None:
+        page = _reports_page(period, today)
+        page_cache_put(key, page)
+    return html_ok(start_response, page, etag)
+
+
+def _reports_page(period: str, today: date) -> bytes:
     if period == 'today':
         start_dt = today
     elif period == 'week':
@@ -365,47 +564,41 @@ def reports(environ, start_response):
         </div>
     </div>
     """
-    start_response('200 OK', [('Content-Type', 'text/html; charset=utf-8')])
-    return [render_page('Relatórios', body)]
+    return render_page('Relatórios', body)
+
+
+# Tabela de rotas: (padrão do caminho inteiro, métodos aceitos ou None para qualquer um, nome da rota)
+# (ids com até 18 dígitos: cabem em int8 e nunca estouram o limite de int(); maiores dão 404)
+_ROUTES = (
+    (re.compile(r'/'), None, 'root'),
+    (re.compile(r'/static/.*', re.S), None, 'static'),
+    (re.compile(r'/clients'), ('GET',), 'clients_list'),
+    (re.compile(r'/clients'), ('POST',), 'clients_create'),
+    (re.compile(r'/clients/new'), ('GET',), 'clients_new'),
+    (re.compile(r'/clients/([0-9]{1,18})/edit'), None, 'clients_edit'),
+    (re.compile(r'/clients/([0-9]{1,18})/update'), ('POST',), 'clients_update'),
+    (re.compile(r'/clients/([0-9]{1,18})/delete'), ('POST',), 'clients_delete'),
+    (re.compile(r'/reports'), None, 'reports'),
+)
 
 
 def route(environ) -> Tuple[str, Optional[int]]:
     path = environ.get('PATH_INFO', '/')
-    if path == '/':
-        return 'root', None
-    if path.startswith('/static/'):
-        return 'static', None
-    if path == '/clients' and environ['REQUEST_METHOD'] == 'GET':
-        return 'clients_list', None
-    if path == '/clients' and environ['REQUEST_METHOD'] == 'POST':
-        return 'clients_create', None
-    if path == '/clients/new' and environ['REQUEST_METHOD'] == 'GET':
-        return 'clients_new', None
-    if path.startswith('/clients/') and path.endswith('/edit'):
-        try:
-            cid = int(path.split('/')[2])
-            return 'clients_edit', cid
-        except Exception:
-            return '404', None
-    if path.startswith('/clients/') and path.endswith('/update') and environ['REQUEST_METHOD'] == 'POST':
-        try:
-            cid = int(path.split('/')[2])
-            return 'clients_update', cid
-        except Exception:
-            return '404', None
-    if path.startswith('/clients/') and path.endswith('/delete') and environ['REQUEST_METHOD'] == 'POST':
-        try:
-            cid = int(path.split('/')[2])
-            return 'clients_delete', cid
-        except Exception:
-            return '404', None
-    if path == '/reports':
-        return 'reports', None
+    method = environ['REQUEST_METHOD']
+    for pattern, methods, name in _ROUTES:
+        m = pattern.fullmatch(path)
+        if m is None or (methods is not None and method not in methods):
+            continue
+        return name, (int(m.group(1)) if pattern.groups else None)
     return '404', None
 
 
-def application(environ, start_response):
+# Schema garantido uma vez por processo, na importação (e não a cada requisição)
+if os.environ.get('SKIP_INIT_DB') != '1':
     init_db()
+
+
+def application(environ, start_response):
     r, arg = route(environ)
     if r == 'root':
         return http_redirect(start_response, '/clients')
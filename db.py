@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 import os
+import threading
+from contextlib import contextmanager
 from typing import Optional, Tuple
 from datetime import date
 
 import psycopg
 from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 
 
 def _dsn_from_env() -> str:
@@ -19,12 +22,37 @@ def _dsn_from_env() -> str:
     return f"postgresql://{user}:{password}@{host}:{port}/{dbname}"
 
 
+_POOL: Optional[ConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> ConnectionPool:
+    # Pool criado na primeira consulta de uma requisição (e não no import, nem por init_db),
+    # uma vez por processo
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ConnectionPool(
+                    _dsn_from_env(),
+                    min_size=2,
+                    max_size=10,
+                    kwargs={'autocommit': True, 'row_factory': dict_row},
+                    open=True,
+                )
+    return _POOL
+
+
+@contextmanager
 def get_db():
-    return psycopg.connect(_dsn_from_env(), autocommit=True, row_factory=dict_row)
+    with _get_pool().connection() as conn:
+        yield conn
 
 
 def init_db():
-    with get_db() as conn:
+    # Conexão própria, fora do pool: init_db roda no import de app.py e não deve abrir o
+    # pool (nem suas threads/conexões) antes de um eventual fork dos workers
+    with psycopg.connect(_dsn_from_env(), autocommit=True) as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
@@ -36,32 +64,97 @@ def init_db():
                     data_cadastro DATE NOT NULL DEFAULT CURRENT_DATE,
                     renda_familiar NUMERIC(14,2)
                 );
+                CREATE INDEX IF NOT EXISTS clients_nome_sort ON clients (nome);
+                CREATE INDEX IF NOT EXISTS clients_cadastro_renda ON clients (data_cadastro)
+                    INCLUDE (renda_familiar, data_nascimento)
+                    WHERE renda_familiar IS NOT NULL;
+
+                -- Versão dos dados de clients (uma linha), trocada por trigger a cada escrita,
+                -- inclusive as feitas fora da aplicação (psql, migrações, outros processos)
+                CREATE TABLE IF NOT EXISTS clients_version (
+                    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                    version BIGINT NOT NULL
+                );
+                INSERT INTO clients_version (id, version) VALUES (TRUE, txid_current())
+                    ON CONFLICT (id) DO NOTHING;
+                CREATE OR REPLACE FUNCTION clients_bump_version() RETURNS trigger AS $$
+                BEGIN
+                    UPDATE clients_version SET version = txid_current() WHERE id;
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_trigger
+                         WHERE tgname = 'clients_bump_version' AND tgrelid = 'clients'::regclass
+                    ) THEN
+                        CREATE TRIGGER clients_bump_version
+                            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON clients
+                            FOR EACH STATEMENT EXECUTE FUNCTION clients_bump_version();
+                    END IF;
+                END
+                $$;
                 """
             )
+            # Busca por ILIKE '%q%' usa índice trigram; sem pg_trgm disponível, segue sem ele
+            try:
+                cur.execute(
+                    """
+                    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+                    CREATE INDEX IF NOT EXISTS clients_nome_trgm ON clients USING gin (nome gin_trgm_ops);
+                    """
+                )
+            except psycopg.Error:
+                pass
+
+
+# Listagem: só as colunas exibidas; classe de renda (A/B/C) e rótulo "R$ 1.234" calculados no banco
+SQL_FETCH_CLIENTS = """
+SELECT id, nome,
+       CASE
+           WHEN renda_familiar IS NULL THEN NULL
+           WHEN renda_familiar <= 980.0 THEN 'A'
+           WHEN renda_familiar <= 2500.0 THEN 'B'
+           ELSE 'C'
+       END AS renda_classe,
+       COALESCE('R$ ' || REPLACE(TO_CHAR(ROUND(renda_familiar), 'FM999,999,999,999,990'), ',', '.'), '—') AS renda_fmt
+  FROM clients
+"""
+SQL_FETCH_CLIENTS_ALL = SQL_FETCH_CLIENTS + " ORDER BY nome ASC"
+SQL_FETCH_CLIENTS_SEARCH = SQL_FETCH_CLIENTS + " WHERE nome ILIKE %s ORDER BY nome ASC"
+SQL_DATA_VERSION = "SELECT version FROM clients_version WHERE id"
+SQL_FETCH_CLIENT_BY_ID = "SELECT id, nome, cpf, data_nascimento, data_cadastro, renda_familiar FROM clients WHERE id = %s"
+
+
+def data_version() -> int:
+    # Muda a cada escrita em clients (trigger), vista por todos os processos
+    with get_db() as conn, conn.cursor() as cur:
+        cur.execute(SQL_DATA_VERSION, prepare=True)
+        return cur.fetchone()['version']
 
 
+# Consultas frequentes: prepared statement no servidor (por conexão do pool) e resultado em binário
 def fetch_clients(q: str):
-    with get_db() as conn, conn.cursor() as cur:
+    with get_db() as conn, conn.cursor(binary=True) as cur:
         if q:
-            cur.execute(
-                "SELECT id, nome, cpf, TO_CHAR(data_nascimento, 'YYYY-MM-DD') AS data_nascimento, TO_CHAR(data_cadastro, 'YYYY-MM-DD') AS data_cadastro, renda_familiar FROM clients WHERE nome ILIKE %s ORDER BY nome ASC",
-                (f"%{q}%",),
-            )
+            cur.execute(SQL_FETCH_CLIENTS_SEARCH, (f"%{q}%",), prepare=True)
         else:
-            cur.execute(
-                "SELECT id, nome, cpf, TO_CHAR(data_nascimento, 'YYYY-MM-DD') AS data_nascimento, TO_CHAR(data_cadastro, 'YYYY-MM-DD') AS data_cadastro, renda_familiar FROM clients ORDER BY nome ASC"
-            )
+            cur.execute(SQL_FETCH_CLIENTS_ALL, prepare=True)
         return [dict(row) for row in cur.fetchall()]
 
 
 def fetch_client_by_id(cid: int):
-    with get_db() as conn, conn.cursor() as cur:
-        cur.execute(
-            "SELECT id, nome, cpf, TO_CHAR(data_nascimento, 'YYYY-MM-DD') AS data_nascimento, TO_CHAR(data_cadastro, 'YYYY-MM-DD') AS data_cadastro, renda_familiar FROM clients WHERE id = %s",
-            (cid,),
-        )
+    with get_db() as conn, conn.cursor(binary=True) as cur:
+        cur.execute(SQL_FETCH_CLIENT_BY_ID, (cid,), prepare=True)
         row = cur.fetchone()
-        return dict(row) if row else None
+        if not row:
+            return None
+        client = dict(row)
+        # Datas chegam como date; o formulário trabalha com ISO (YYYY-MM-DD)
+        client['data_nascimento'] = client['data_nascimento'].isoformat()
+        client['data_cadastro'] = client['data_cadastro'].isoformat()
+        return client
 
 
 def insert_client(nome: str, cpf: str, data_nascimento: str, data_cadastro: str, renda_familiar: Optional[float]) -> Tuple[bool, Optional[str]]:
@@ -106,41 +199,31 @@ def delete_client(cid: int):
 
 def fetch_income_stats(start_date_iso: str):
     with get_db() as conn, conn.cursor() as cur:
-        # Average income across all with renda not null
-        cur.execute("SELECT AVG(renda_familiar) AS avg_income FROM clients WHERE renda_familiar IS NOT NULL")
-        avg_row = cur.fetchone()
-        avg_income = avg_row['avg_income'] if avg_row and avg_row['avg_income'] is not None else 0.0
-
-        # Over 18 and income > average, within period (using AGE to compute years)
-        cur.execute(
-            """
-            SELECT COUNT(*) AS qty
-              FROM clients
-             WHERE data_cadastro >= %s
-               AND renda_familiar IS NOT NULL
-               AND renda_familiar > %s
-               AND EXTRACT(YEAR FROM AGE(CURRENT_DATE, data_nascimento)) >= 18
-            """,
-            (start_date_iso, avg_income),
-        )
-        over_18_above_avg = cur.fetchone()['qty']
-
-        # Counts per class within period
+        # Uma única varredura: média geral (todos com renda) + contagens do período via FILTER
         cur.execute(
             """
+            WITH avg_c AS (
+                SELECT AVG(renda_familiar) AS a FROM clients WHERE renda_familiar IS NOT NULL
+            )
             SELECT
-                COALESCE(SUM(CASE WHEN renda_familiar <= 980.0 THEN 1 ELSE 0 END), 0) AS class_a,
-                COALESCE(SUM(CASE WHEN renda_familiar > 980.0 AND renda_familiar <= 2500.0 THEN 1 ELSE 0 END), 0) AS class_b,
-                COALESCE(SUM(CASE WHEN renda_familiar > 2500.0 THEN 1 ELSE 0 END), 0) AS class_c
+                (SELECT a FROM avg_c) AS avg_income,
+                COUNT(*) FILTER (
+                    WHERE data_cadastro >= %(start)s
+                      AND renda_familiar > COALESCE((SELECT a FROM avg_c), 0)
+                      AND EXTRACT(YEAR FROM AGE(CURRENT_DATE, data_nascimento)) >= 18
+                ) AS over_18_above_avg,
+                COUNT(*) FILTER (WHERE data_cadastro >= %(start)s AND renda_familiar <= 980.0) AS class_a,
+                COUNT(*) FILTER (WHERE data_cadastro >= %(start)s AND renda_familiar > 980.0 AND renda_familiar <= 2500.0) AS class_b,
+                COUNT(*) FILTER (WHERE data_cadastro >= %(start)s AND renda_familiar > 2500.0) AS class_c
               FROM clients
-             WHERE data_cadastro >= %s AND renda_familiar IS NOT NULL
+             WHERE renda_familiar IS NOT NULL
             """,
-            (start_date_iso,),
+            {'start': start_date_iso},
         )
         row = cur.fetchone()
         return {
-            'avg_income': float(avg_income or 0.0),
-            'over_18_above_avg': int(over_18_above_avg or 0),
+            'avg_income': float(row['avg_income'] or 0.0),
+            'over_18_above_avg': int(row['over_18_above_avg'] or 0),
             'class_a': int(row['class_a'] or 0),
             'class_b': int(row['class_b'] or 0),
             'class_c': int(row['class_c'] or 0),
@@ -1,12 +1,11 @@
 #!/usr/bin/env python3
-from wsgiref.simple_server import make_server
+from waitress import serve
 from app import application
 
 if __name__ == "__main__":
-    with make_server("127.0.0.1", 8000, application) as httpd:
-        print("Serving on http://127.0.0.1:8000 …")
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            print("\nServer stopped.")
-
+    print("Serving on http://127.0.0.1:8000 …")
+    try:
+        # Pool de threads: atende requisições concorrentes (o wsgiref atende uma por vez)
+        serve(application, host="127.0.0.1", port=8000, threads=8)
+    except KeyboardInterrupt:
+        print("\nServer stopped.")